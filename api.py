@@ -0,0 +1,191 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from main import generate_cover_letters_batch, validate_job_description, validate_resume
+from pdf import create_pdf
+from prompt import MAX_BATCH_SIZE, get_bedrock_client
+
+# Run with: uvicorn api:app
+
+# Micro-batching: requests arriving within this window share Bedrock calls.
+# A batch holds at most prompt.MAX_BATCH_SIZE letters, i.e. one Bedrock call.
+MAX_QUEUE_TIME = 0.1  # seconds
+MAX_CONCURRENT_BATCHES = 4
+
+
+class CoverLetterRequest(BaseModel):
+    job_description: str
+    resume: Optional[Dict[str, Any]] = None
+
+
+class CoverLetterResponse(BaseModel):
+    cover_letter: str
+
+
+class CoverLetterBatcher:
+    """
+    Collect concurrent cover letter requests and send them to Bedrock together.
+
+    Requests queued within MAX_QUEUE_TIME of each other (up to MAX_BATCH_SIZE)
+    are grouped by resume and generated with generate_cover_letters_batch.
+    Up to MAX_CONCURRENT_BATCHES batches run at once while the next one is
+    being collected.
+    """
+
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE, max_queue_time: float = MAX_QUEUE_TIME,
+                 max_concurrent_batches: int = MAX_CONCURRENT_BATCHES):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [self._worker, *self._tasks] if self._worker else list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, resume: Dict[str, Any], job_description: str) -> str:
+        """Queue one request and wait for its cover letter."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((resume, job_description, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], str, asyncio.Future]]:
+        items = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_queue_time
+
+        while len(items) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return items
+
+    async def _run(self) -> None:
+        while True:
+            items = await self._collect()
+
+            # Only job descriptions for the same resume can share a prompt
+            groups: Dict[str, List[Tuple[Dict[str, Any], str, asyncio.Future]]] = {}
+            for item in items:
+                groups.setdefault(json.dumps(item[0], sort_keys=True), []).append(item)
+
+            # Hand each group off so collection continues while Bedrock works;
+            # the semaphore holds collection back once every slot is busy
+            for group in groups.values():
+                await self._slots.acquire()
+                task = asyncio.create_task(self._generate(group))
+                self._tasks.add(task)
+                task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+
+    async def _generate(self, group: List[Tuple[Dict[str, Any], str, asyncio.Future]]) -> None:
+        resume = group[0][0]
+        job_descriptions = [job_description for _, job_description, _ in group]
+
+        # Failed letters come back as exceptions in place, after
+        # generate_cover_letters_batch has retried them one at a time
+        try:
+            results = await asyncio.to_thread(
+                generate_cover_letters_batch, resume, job_descriptions, get_bedrock_client()
+            )
+        except Exception as e:
+            for _, _, future in group:
+                self._resolve(future, error=e)
+            return
+
+        for (_, _, future), result in zip(group, results):
+            if isinstance(result, Exception):
+                self._resolve(future, error=result)
+            else:
+                self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Optional[str] = None,
+                 error: Optional[Exception] = None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+batcher = CoverLetterBatcher()
+default_resume = json.loads(Path("example_resume.json").read_bytes())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the batcher for as long as the app is serving."""
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="AI Cover Letter Generator", lifespan=lifespan)
+
+
+async def _generate_text(request: CoverLetterRequest) -> str:
+    resume = request.resume or default_resume
+    job_description = request.job_description.strip()
+
+    # Validate before queueing so a bad request never joins a shared batch
+    try:
+        validate_resume(resume)
+        validate_job_description(job_description)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        return await batcher.submit(resume, job_description)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@app.post("/cover-letter", response_model=CoverLetterResponse)
+async def cover_letter(request: CoverLetterRequest) -> CoverLetterResponse:
+    """Generate a cover letter and return its text."""
+    return CoverLetterResponse(cover_letter=await _generate_text(request))
+
+
+@app.post("/cover-letter/pdf")
+async def cover_letter_pdf(request: CoverLetterRequest) -> Response:
+    """Generate a cover letter and return it as a PDF."""
+    text = await _generate_text(request)
+
+    try:
+        pdf_bytes = await asyncio.to_thread(create_pdf, text)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="cover_letter.pdf"'}
+    )
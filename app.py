@@ -1,9 +1,6 @@
 import streamlit as st
-import json
+import orjson
 from pathlib import Path
-import time
-from main import generate_cover_letter
-from pdf import create_pdf
 import traceback
 
 # Page configuration
@@ -41,30 +38,76 @@ st.markdown('<div class="sub-header">Generate professional, personalized cover l
             unsafe_allow_html=True)
 
 # Initialize session state
-if 'cover_letter' not in st.session_state:
-    st.session_state.cover_letter = None
-if 'pdf_bytes' not in st.session_state:
-    st.session_state.pdf_bytes = None
+st.session_state.setdefault('cover_letter', None)
+st.session_state.setdefault('pdf_bytes', None)
+st.session_state.setdefault('batch_letters', None)
 
 
-# Load hardcoded resume
-@st.cache_data
+# Load hardcoded resume. cache_resource hands back the same dict on every
+# rerun, which lets validate_resume skip resumes it has already checked.
+@st.cache_resource
 def load_resume():
     """Load the resume from example_resume.json"""
     try:
-        resume_path = Path("example_resume.json")
-        if not resume_path.exists():
-            st.error("❌ Resume file 'example_resume.json' not found in the project directory!")
-            st.stop()
-
-        with open(resume_path, 'r', encoding='utf-8') as f:
-            resume_data = json.load(f)
+        raw = Path("example_resume.json").read_bytes()
+        # orjson parses bytes directly
+        resume_data = orjson.loads(raw)
         return resume_data
+    except FileNotFoundError:
+        st.error("❌ Resume file 'example_resume.json' not found in the project directory!")
+        st.stop()
     except Exception as e:
         st.error(f"❌ Error loading resume: {str(e)}")
         st.stop()
 
 
+# prompt.get_bedrock_client already shares one client per process across
+# reruns; not caching it here keeps prompt.clear_cache() effective
+def get_bedrock_client():
+    """Return the shared AWS Bedrock runtime client"""
+    # Imported here so boto3 is only loaded once a cover letter is requested
+    from prompt import get_bedrock_client as build_bedrock_client
+    return build_bedrock_client()
+
+
+# Cache rendered PDFs by cover letter text so reruns skip rebuilding them
+@st.cache_data(max_entries=32, show_spinner=False)
+def create_pdf_cached(cover_letter_text):
+    """Render the cover letter PDF, reusing earlier results for the same text"""
+    # Imported here so ReportLab is only loaded once a PDF is needed
+    from pdf import create_pdf
+    return create_pdf(cover_letter_text)
+
+
+def record_error(key, exc):
+    """Store an exception under key for show_error"""
+    # TracebackException keeps the stack without its frames; source lines are
+    # only read, and the traceback only formatted, when the user asks for it
+    st.session_state[key] = traceback.TracebackException.from_exception(exc, lookup_lines=False)
+    st.session_state[f"{key}_show_tb"] = False
+
+
+def show_error(key):
+    """Show the error stored under key, formatting its traceback only on request"""
+    error = st.session_state.get(key)
+    if error is None:
+        return
+
+    st.error(f"❌ An error occurred: {error}")
+    if st.session_state.get(f"{key}_show_tb"):
+        with st.expander("🔍 Error Details", expanded=True):
+            st.code(''.join(error.format()))
+    else:
+        st.button("🔍 Show Error Details", key=f"{key}_tb_button",
+                  on_click=st.session_state.__setitem__, args=(f"{key}_show_tb", True))
+
+
+def clear_error(key):
+    """Forget the error stored under key"""
+    st.session_state[key] = None
+    st.session_state[f"{key}_show_tb"] = False
+
+
 # Load resume data
 resume_data = load_resume()
 
@@ -86,40 +129,54 @@ job_description = st.text_area(
     "Paste the complete job description here",
     height=300,
     placeholder="Paste the full job description including role overview, responsibilities, requirements, and company information...",
-    help="Include as much detail as possible for a better cover letter"
+    help="Include as much detail as possible for a better cover letter",
+    # An error from the previous job description no longer applies
+    on_change=clear_error,
+    args=('_last_exc',)
 )
 
 # Generate button
 if job_description and len(job_description.strip()) >= 50:
     if st.button("🚀 Generate Cover Letter PDF", type="primary", use_container_width=True):
+        clear_error('_last_exc')
         try:
-            with st.spinner("🤖 AI is crafting your personalized cover letter... This may take 10-20 seconds."):
-                # Generate cover letter
-                cover_letter = generate_cover_letter(resume_data, job_description.strip())
+            from main import stream_cover_letter, finalize_cover_letter
+
+            with st.spinner("🤖 AI is crafting your personalized cover letter..."):
+                # Stream the cover letter into a temporary placeholder as it is generated
+                chunks = stream_cover_letter(
+                    resume_data, job_description.strip(), client=get_bedrock_client()
+                )
+                stream_box = st.empty()
+                with stream_box.container():
+                    streamed_text = st.write_stream(chunks)
+                stream_box.empty()
+
+                cover_letter = finalize_cover_letter(streamed_text)
                 st.session_state.cover_letter = cover_letter
 
-            with st.spinner("📄 Creating PDF..."):
-                # Generate PDF
-                pdf_bytes = create_pdf(cover_letter)
-                st.session_state.pdf_bytes = pdf_bytes
-                time.sleep(0.3)  # Brief pause for UX
+            # The PDF is built when the download button renders
+            st.session_state.pdf_bytes = None
 
             st.success("✅ Cover letter generated successfully!")
 
         except ValueError as ve:
             st.error(f"❌ Validation Error: {str(ve)}")
         except Exception as e:
-            st.error(f"❌ An error occurred: {str(e)}")
-            with st.expander("🔍 Error Details"):
-                st.code(traceback.format_exc())
+            record_error('_last_exc', e)
+
+    show_error('_last_exc')
 else:
     if not job_description:
         st.info("👆 Paste a job description above to get started!")
     elif len(job_description.strip()) < 50:
         st.warning("⚠️ Job description seems too short. Please provide more details (minimum 50 characters).")
 
-# Display results
-if st.session_state.cover_letter:
+# Display results. As a fragment, clicks inside it (e.g. downloading) only
+# rerun this block instead of the whole page.
+@st.fragment
+def show_result():
+    """Show the generated cover letter with its download and reset buttons"""
     st.markdown("---")
     st.markdown("### 📝 Your Cover Letter")
 
@@ -137,6 +194,13 @@ if st.session_state.cover_letter:
     col1, col2, col3 = st.columns([1, 1, 1])
 
     with col2:
+        if st.session_state.pdf_bytes is None:
+            try:
+                with st.spinner("📄 Creating PDF..."):
+                    st.session_state.pdf_bytes = create_pdf_cached(st.session_state.cover_letter)
+            except Exception as e:
+                st.error(f"❌ An error occurred: {str(e)}")
+
         if st.session_state.pdf_bytes:
             st.download_button(
                 label="⬇️ Download PDF",
@@ -152,6 +216,58 @@ if st.session_state.cover_letter:
         st.session_state.pdf_bytes = None
         st.rerun()
 
+
+if st.session_state.cover_letter:
+    show_result()
+
+# Bulk mode: several job descriptions, fewer Bedrock calls
+st.markdown("---")
+with st.expander("📚 Bulk Mode: Generate for Multiple Jobs"):
+    st.markdown(
+        "Upload a **.txt** file with job descriptions separated by a line containing only `---`, "
+        "or a **.jsonl** file with one job description per line."
+    )
+    jobs_file = st.file_uploader("Job descriptions file", type=["txt", "jsonl"],
+                                 on_change=clear_error, args=('_last_batch_exc',))
+
+    if jobs_file is not None and st.button("🚀 Generate All Cover Letters", use_container_width=True):
+        clear_error('_last_batch_exc')
+        try:
+            from main import parse_job_descriptions, generate_cover_letters_batch
+
+            job_descriptions = parse_job_descriptions(jobs_file.getvalue(), jobs_file.name)
+            with st.spinner(f"🤖 AI is crafting {len(job_descriptions)} cover letters..."):
+                st.session_state.batch_letters = generate_cover_letters_batch(
+                    resume_data, job_descriptions, client=get_bedrock_client()
+                )
+            generated = sum(isinstance(letter, str) for letter in st.session_state.batch_letters)
+            st.success(f"✅ Generated {generated} of {len(st.session_state.batch_letters)} cover letters!")
+
+        except ValueError as ve:
+            st.error(f"❌ Validation Error: {str(ve)}")
+        except Exception as e:
+            record_error('_last_batch_exc', e)
+
+    show_error('_last_batch_exc')
+
+    if st.session_state.batch_letters:
+        for i, letter in enumerate(st.session_state.batch_letters, 1):
+            st.markdown(f"#### 📝 Cover Letter {i}")
+            if isinstance(letter, Exception):
+                st.error(f"❌ {str(letter)}")
+                continue
+            st.text(letter)
+            try:
+                st.download_button(
+                    label=f"⬇️ Download PDF {i}",
+                    data=create_pdf_cached(letter),
+                    file_name=f"cover_letter_{i}.pdf",
+                    mime="application/pdf",
+                    key=f"batch_pdf_{i}"
+                )
+            except Exception as e:
+                st.error(f"❌ An error occurred: {str(e)}")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -1,18 +1,33 @@
-from prompt import generate_cover_letter_with_ai
+from prompt import (
+    generate_cover_letter_with_ai, stream_cover_letter_with_ai, clean_cover_letter,
+    generate_cover_letters_batch_with_ai, MAX_BATCH_SIZE
+)
 import json
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Iterator, List, Union
+
+# Resumes that already passed validation, keyed by id(). The dict itself is
+# stored so its id cannot be reused by another object while cached.
+_VALIDATED: Dict[int, Dict[str, Any]] = {}
+_VALIDATED_MAX_ENTRIES = 8
 
 
 def validate_resume(resume: Dict[str, Any]) -> None:
     """
     Validate that resume contains all required fields.
 
+    Validation is skipped for a resume object that has already passed, so
+    the resume should be treated as read-only once validated.
+
     Args:
         resume: Resume data as dictionary
 
     Raises:
         ValueError: If required fields are missing or invalid
     """
+    if _VALIDATED.get(id(resume)) is resume:
+        return
+
     required_fields = ['experience', 'skills', 'project', 'contacts']
 
     # Check for required fields
@@ -40,6 +55,10 @@ def validate_resume(resume: Dict[str, Any]) -> None:
     if 'email' not in resume['contacts']:
         raise ValueError("'contacts' must include at least an 'email' field")
 
+    if len(_VALIDATED) >= _VALIDATED_MAX_ENTRIES:
+        _VALIDATED.clear()
+    _VALIDATED[id(resume)] = resume
+
 
 def validate_job_description(job_description: str) -> None:
     """
@@ -58,13 +77,14 @@ def validate_job_description(job_description: str) -> None:
         raise ValueError("Job description seems too short (minimum 50 characters)")
 
 
-def generate_cover_letter(resume: Dict[str, Any], job_description: str) -> str:
+def generate_cover_letter(resume: Dict[str, Any], job_description: str, client=None) -> str:
     """
     Generate a personalized cover letter using resume and job description.
 
     Args:
         resume: Dictionary containing resume information
         job_description: Text of the job description
+        client: Optional pre-built Bedrock runtime client to reuse
 
     Returns:
         Generated cover letter text
@@ -80,7 +100,7 @@ def generate_cover_letter(resume: Dict[str, Any], job_description: str) -> str:
 
 
         # Generate cover letter using AI
-        cover_letter = generate_cover_letter_with_ai(resume, job_description)
+        cover_letter = generate_cover_letter_with_ai(resume, job_description, bedrock=client)
 
         if not cover_letter or len(cover_letter.strip()) < 100:
             raise Exception("Generated cover letter is too short or empty")
@@ -94,3 +114,138 @@ def generate_cover_letter(resume: Dict[str, Any], job_description: str) -> str:
         # Wrap other exceptions with context
         raise Exception(f"Failed to generate cover letter: {str(e)}")
 
+
+def stream_cover_letter(resume: Dict[str, Any], job_description: str, client=None) -> Iterator[str]:
+    """
+    Validate inputs, then stream the cover letter text as the model produces it.
+
+    Validation runs immediately, before any chunk is requested from Bedrock.
+    Pass the joined chunks to finalize_cover_letter once the stream ends.
+
+    Args:
+        resume: Dictionary containing resume information
+        job_description: Text of the job description
+        client: Optional pre-built Bedrock runtime client to reuse
+
+    Returns:
+        Iterator of raw text chunks
+
+    Raises:
+        ValueError: If validation fails
+    """
+    validate_resume(resume)
+    validate_job_description(job_description)
+
+    return stream_cover_letter_with_ai(resume, job_description, bedrock=client)
+
+
+def finalize_cover_letter(streamed_text: str) -> str:
+    """
+    Clean up and check the full text assembled from stream_cover_letter.
+
+    Args:
+        streamed_text: Concatenated stream chunks
+
+    Returns:
+        Final cover letter text
+
+    Raises:
+        Exception: If the cover letter is too short or empty
+    """
+    try:
+        return clean_cover_letter(streamed_text)
+    except Exception as e:
+        raise Exception(f"Failed to generate cover letter: {str(e)}")
+
+
+def parse_job_descriptions(data: bytes, filename: str) -> List[str]:
+    """
+    Read job descriptions from an uploaded bulk file.
+
+    A .jsonl file holds one job per line, either a JSON string or an object
+    with a 'job_description' field. Any other file is treated as plain text
+    with job descriptions separated by lines containing only '---'.
+
+    Args:
+        data: Raw file contents
+        filename: Uploaded file name, used to pick the format
+
+    Returns:
+        Non-empty job description texts
+
+    Raises:
+        ValueError: If the file cannot be parsed or contains no job descriptions
+    """
+    text = data.decode('utf-8')
+
+    if filename.lower().endswith('.jsonl'):
+        job_descriptions = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_no} is not valid JSON: {str(e)}")
+            if isinstance(item, dict):
+                item = item.get('job_description', '')
+            if not isinstance(item, str):
+                raise ValueError(f"Line {line_no} must be a string or an object with a 'job_description' field")
+            job_descriptions.append(item)
+    else:
+        job_descriptions = re.split(r'^\s*---\s*$', text, flags=re.MULTILINE)
+
+    job_descriptions = [jd.strip() for jd in job_descriptions if jd.strip()]
+    if not job_descriptions:
+        raise ValueError("No job descriptions found in the uploaded file")
+
+    return job_descriptions
+
+
+def generate_cover_letters_batch(resume: Dict[str, Any], job_descriptions: List[str],
+                                 client=None) -> List[Union[str, Exception]]:
+    """
+    Generate one cover letter per job description, several per Bedrock call.
+
+    A failed call does not discard letters already generated: the job
+    descriptions it covered are retried one at a time, and any that still
+    fail get an exception in place of their cover letter.
+
+    Args:
+        resume: Dictionary containing resume information
+        job_descriptions: Job description texts
+        client: Optional pre-built Bedrock runtime client to reuse
+
+    Returns:
+        Cover letter text or the exception for each job description, in order
+
+    Raises:
+        ValueError: If validation fails
+    """
+    validate_resume(resume)
+    for i, job_description in enumerate(job_descriptions, 1):
+        try:
+            validate_job_description(job_description)
+        except ValueError as e:
+            raise ValueError(f"Job {i}: {str(e)}")
+
+    results: List[Union[str, Exception]] = []
+    for start in range(0, len(job_descriptions), MAX_BATCH_SIZE):
+        batch = job_descriptions[start:start + MAX_BATCH_SIZE]
+        try:
+            results.extend(generate_cover_letters_batch_with_ai(resume, batch, bedrock=client))
+            continue
+        except Exception as e:
+            if len(batch) == 1:
+                results.append(Exception(f"Failed to generate cover letter: {str(e)}"))
+                continue
+
+        # One bad letter (e.g. too short, or a count mismatch) fails the whole
+        # call, so give each job description in it a call of its own
+        for job_description in batch:
+            try:
+                results.append(generate_cover_letter_with_ai(resume, job_description, bedrock=client))
+            except Exception as e:
+                results.append(Exception(f"Failed to generate cover letter: {str(e)}"))
+
+    return results
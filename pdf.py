@@ -4,6 +4,178 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.enums import TA_LEFT, TA_JUSTIFY
 from io import BytesIO
+from enum import Enum
+from typing import List, Tuple
+import re
+
+# Paragraph classification patterns, compiled once
+MONTH_RE = re.compile(
+    r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\b'
+)
+DIGIT_RE = re.compile(r'\d')
+HEADER_HINT_RE = re.compile(r'@|http|www\.', re.IGNORECASE)
+
+
+class ParagraphKind(Enum):
+    """Sections of a cover letter, in the order they appear"""
+    HEADER = 'header'
+    DATE = 'date'
+    EMPLOYER = 'employer'
+    SUBJECT = 'subject'
+    GREETING = 'greeting'
+    BODY = 'body'
+    CLOSING = 'closing'
+
+
+# Sections identified by their opening word, looked up by first character
+PREFIX_KINDS = {
+    'S': (('Subject:', ParagraphKind.SUBJECT), ('Sincerely', ParagraphKind.CLOSING)),
+    'D': (('Dear', ParagraphKind.GREETING),),
+}
+
+# Sections rendered line by line
+MULTILINE_KINDS = frozenset({ParagraphKind.HEADER, ParagraphKind.EMPLOYER, ParagraphKind.CLOSING})
+
+# Sections followed by a 0.4 cm gap
+SPACED_KINDS = frozenset({
+    ParagraphKind.HEADER, ParagraphKind.DATE, ParagraphKind.EMPLOYER, ParagraphKind.SUBJECT
+})
+
+# Paragraph styles, built once at import
+_STYLES = getSampleStyleSheet()
+
+# Custom style for header/contact information (each line separate)
+_HEADER_STYLE = ParagraphStyle(
+    'CoverLetterHeader',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=16.5,
+    alignment=TA_LEFT,
+    spaceAfter=2,
+    spaceBefore=0,
+    fontName='Times-Roman'
+)
+
+# Custom style for body paragraphs - JUSTIFIED
+_BODY_STYLE = ParagraphStyle(
+    'CoverLetterBody',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=16.5,
+    alignment=TA_JUSTIFY,
+    spaceAfter=11,
+    spaceBefore=0,
+    fontName='Times-Roman',
+    firstLineIndent=0
+)
+
+# Custom style for date and employer info
+_INFO_STYLE = ParagraphStyle(
+    'InfoStyle',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=16.5,
+    alignment=TA_LEFT,
+    spaceAfter=2,
+    spaceBefore=0,
+    fontName='Times-Roman'
+)
+
+# Custom style for greeting
+_GREETING_STYLE = ParagraphStyle(
+    'GreetingStyle',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=16.5,
+    alignment=TA_LEFT,
+    spaceAfter=11,
+    spaceBefore=0,
+    fontName='Times-Roman'
+)
+
+# Custom style for closing
+_CLOSING_STYLE = ParagraphStyle(
+    'ClosingStyle',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=16.5,
+    alignment=TA_LEFT,
+    spaceAfter=2,
+    spaceBefore=11,
+    fontName='Times-Roman'
+)
+
+# Style for each kind of paragraph
+_KIND_STYLES = {
+    ParagraphKind.HEADER: _HEADER_STYLE,
+    ParagraphKind.DATE: _INFO_STYLE,
+    ParagraphKind.EMPLOYER: _INFO_STYLE,
+    ParagraphKind.SUBJECT: _INFO_STYLE,
+    ParagraphKind.GREETING: _GREETING_STYLE,
+    ParagraphKind.BODY: _BODY_STYLE,
+    ParagraphKind.CLOSING: _CLOSING_STYLE,
+}
+
+
+def classify_paragraphs(cover_letter_text: str) -> List[Tuple[ParagraphKind, Tuple[str, ...]]]:
+    """
+    Split cover letter text into paragraphs and classify each one.
+
+    Args:
+        cover_letter_text: The cover letter content as string
+
+    Returns:
+        List of (kind, lines) pairs; body text outside greeting/closing is dropped
+    """
+    paragraphs = [p.strip() for p in cover_letter_text.split('\n\n')]
+    paragraphs = [p for p in paragraphs if p]
+
+    classified = []
+    greeting_found = False
+    closing_found = False
+
+    for i, para_text in enumerate(paragraphs):
+        prefix_kind = None
+        for prefix, candidate in PREFIX_KINDS.get(para_text[0], ()):
+            if para_text.startswith(prefix):
+                prefix_kind = candidate
+                break
+
+        # Detect section types
+        has_email_or_url = HEADER_HINT_RE.search(para_text) is not None
+        has_phone = ('-' in para_text or '(' in para_text) and DIGIT_RE.search(para_text) is not None
+
+        if i == 0 and (has_email_or_url or has_phone):
+            kind = ParagraphKind.HEADER
+        elif len(para_text) < 50 and MONTH_RE.search(para_text) is not None:
+            kind = ParagraphKind.DATE
+        elif prefix_kind is not None:
+            kind = prefix_kind
+            if kind is ParagraphKind.GREETING:
+                greeting_found = True
+            elif kind is ParagraphKind.CLOSING:
+                closing_found = True
+        elif not greeting_found and i > 0 and len(para_text) < 200 and '\n' in para_text:
+            # Employer info: comes after date, before subject/greeting, and is short
+            kind = ParagraphKind.EMPLOYER
+        elif greeting_found and not closing_found:
+            # Everything else after greeting and before closing is body text
+            kind = ParagraphKind.BODY
+        else:
+            continue
+
+        if kind in MULTILINE_KINDS:
+            # Keep each line of contact/employer/sign-off blocks on its own line
+            lines = tuple(line.strip() for line in para_text.split('\n') if line.strip())
+        elif kind is ParagraphKind.BODY:
+            # Replace newlines within paragraph with space for proper flow
+            lines = (para_text.replace('\n', ' '),)
+        else:
+            lines = (para_text,)
+
+        classified.append((kind, lines))
+
+    return classified
 
 
 def create_pdf(cover_letter_text: str) -> bytes:
@@ -24,7 +196,14 @@ def create_pdf(cover_letter_text: str) -> bytes:
         # Create a BytesIO buffer to store PDF
         buffer = BytesIO()
 
-        # Create PDF document with 1.3 cm margins
+        sections = classify_paragraphs(cover_letter_text)
+
+        # First header line is the candidate's name
+        author = sections[0][1][0] if sections and sections[0][0] is ParagraphKind.HEADER else ''
+
+        # Create PDF document with 1.3 cm margins. Invariant mode drops the
+        # creation timestamp and random document ID, so the same text always
+        # renders to the same bytes.
         margin = 1.3 * cm
         doc = SimpleDocTemplate(
             buffer,
@@ -32,177 +211,31 @@ def create_pdf(cover_letter_text: str) -> bytes:
             rightMargin=margin,
             leftMargin=margin,
             topMargin=margin,
-            bottomMargin=margin
+            bottomMargin=margin,
+            invariant=1,
+            pageCompression=1,
+            title="Cover Letter",
+            author=author,
+            subject="Professional Cover Letter"
         )
 
         # Container for PDF elements
         elements = []
 
-        # Define styles
-        styles = getSampleStyleSheet()
-
-        # Custom style for header/contact information (each line separate)
-        header_style = ParagraphStyle(
-            'CoverLetterHeader',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=16.5,
-            alignment=TA_LEFT,
-            spaceAfter=2,
-            spaceBefore=0,
-            fontName='Times-Roman'
-        )
-
-        # Custom style for body paragraphs - JUSTIFIED
-        body_style = ParagraphStyle(
-            'CoverLetterBody',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=16.5,
-            alignment=TA_JUSTIFY,
-            spaceAfter=11,
-            spaceBefore=0,
-            fontName='Times-Roman',
-            firstLineIndent=0
-        )
-
-        # Custom style for date and employer info
-        info_style = ParagraphStyle(
-            'InfoStyle',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=16.5,
-            alignment=TA_LEFT,
-            spaceAfter=2,
-            spaceBefore=0,
-            fontName='Times-Roman'
-        )
-
-        # Custom style for greeting
-        greeting_style = ParagraphStyle(
-            'GreetingStyle',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=16.5,
-            alignment=TA_LEFT,
-            spaceAfter=11,
-            spaceBefore=0,
-            fontName='Times-Roman'
-        )
-
-        # Custom style for closing
-        closing_style = ParagraphStyle(
-            'ClosingStyle',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=16.5,
-            alignment=TA_LEFT,
-            spaceAfter=2,
-            spaceBefore=11,
-            fontName='Times-Roman'
-        )
-
-        # Split the cover letter into paragraphs
-        paragraphs = cover_letter_text.split('\n\n')
-
-        greeting_found = False
-        closing_found = False
-
-        # Process each paragraph
-        for i, para_text in enumerate(paragraphs):
-            para_text = para_text.strip()
-
-            if not para_text:
-                continue
-
-            # Detect section types
-            has_email = '@' in para_text
-            has_phone = any(char.isdigit() for char in para_text) and ('-' in para_text or '(' in para_text)
-            has_url = 'http' in para_text.lower() or 'www.' in para_text.lower()
-
-            is_header = i == 0 and (has_email or has_phone or has_url)
-
-            is_date = any(month in para_text for month in [
-                'January', 'February', 'March', 'April', 'May', 'June',
-                'July', 'August', 'September', 'October', 'November', 'December'
-            ]) and len(para_text) < 50
-
-            is_subject = para_text.startswith('Subject:')
-            is_greeting = para_text.startswith('Dear')
-            is_closing = para_text.startswith('Sincerely')
-
-            # Employer info: comes after date, before subject/greeting, and is short
-            is_employer_info = (not is_header and not is_date and not is_subject
-                                and not is_greeting and not is_closing
-                                and not greeting_found and i > 0 and len(para_text) < 200
-                                and '\n' in para_text)
-
-            # Handle header section (contact info with line breaks)
-            if is_header:
-                lines = para_text.split('\n')
-                for line in lines:
-                    if line.strip():
-                        para = Paragraph(line.strip(), header_style)
-                        elements.append(para)
-                elements.append(Spacer(1, 0.4 * cm))
-                continue
-
-            # Handle date
-            if is_date:
-                para = Paragraph(para_text, info_style)
-                elements.append(para)
-                elements.append(Spacer(1, 0.4 * cm))
-                continue
-
-            # Handle employer info (multiple lines)
-            if is_employer_info:
-                lines = para_text.split('\n')
-                for line in lines:
-                    if line.strip():
-                        para = Paragraph(line.strip(), info_style)
-                        elements.append(para)
-                elements.append(Spacer(1, 0.4 * cm))
-                continue
-
-            # Handle subject line
-            if is_subject:
-                para = Paragraph(para_text, info_style)
-                elements.append(para)
+        for kind, lines in sections:
+            style = _KIND_STYLES[kind]
+            for line in lines:
+                elements.append(Paragraph(line, style))
+            if kind in SPACED_KINDS:
                 elements.append(Spacer(1, 0.4 * cm))
-                continue
-
-            # Handle greeting
-            if is_greeting:
-                para = Paragraph(para_text, greeting_style)
-                elements.append(para)
-                greeting_found = True
-                continue
-
-            # Handle closing
-            if is_closing:
-                closing_found = True
-                lines = para_text.split('\n')
-                for line in lines:
-                    if line.strip():
-                        para = Paragraph(line.strip(), closing_style)
-                        elements.append(para)
-                continue
-
-            # Everything else after greeting and before closing is body text
-            if greeting_found and not closing_found:
-                # Replace newlines within paragraph with space for proper flow
-                para_text = para_text.replace('\n', ' ')
-                para = Paragraph(para_text, body_style)
-                elements.append(para)
 
         # Build PDF
         doc.build(elements)
 
-        # Get PDF bytes
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-
-        return pdf_bytes
+        # getvalue() hands back the buffer's bytes without an extra copy
+        # as long as no memoryview of the buffer is held
+        with buffer:
+            return buffer.getvalue()
 
     except Exception as e:
         raise Exception(f"Failed to generate PDF: {str(e)}")
@@ -251,6 +284,11 @@ def create_pdf_advanced(cover_letter_text: str, candidate_name: str = None) -> b
         c.setFont("Times-Roman", 11)
         line_height = 13.2  # 1.2x spacing for readability
 
+        # Measure each distinct word once; line widths are summed from these
+        max_width = right_margin - left_margin
+        space_width = c.stringWidth(" ", "Times-Roman", 11)
+        word_widths = {word: c.stringWidth(word, "Times-Roman", 11) for word in set(cover_letter_text.split())}
+
         # Split text into lines and paragraphs
         paragraphs = cover_letter_text.split('\n\n')
 
@@ -270,19 +308,22 @@ def create_pdf_advanced(cover_letter_text: str, candidate_name: str = None) -> b
 
                 # Word wrap
                 words = line.split()
-                current_line = ""
+                current_words = []
+                current_width = 0
 
                 for word in words:
-                    test_line = current_line + " " + word if current_line else word
-                    text_width = c.stringWidth(test_line, "Times-Roman", 11)
+                    word_width = word_widths[word]
+                    text_width = current_width + space_width + word_width if current_words else word_width
 
-                    if text_width <= (right_margin - left_margin):
-                        current_line = test_line
+                    if text_width <= max_width:
+                        current_words.append(word)
+                        current_width = text_width
                     else:
                         # Draw current line
-                        c.drawString(left_margin, y_position, current_line)
+                        c.drawString(left_margin, y_position, " ".join(current_words))
                         y_position -= line_height
-                        current_line = word
+                        current_words = [word]
+                        current_width = word_width
 
                         # Check if we need a new page
                         if y_position < bottom_margin + 2 * cm:
@@ -291,8 +332,8 @@ def create_pdf_advanced(cover_letter_text: str, candidate_name: str = None) -> b
                             y_position = top_margin
 
                 # Draw remaining text
-                if current_line:
-                    c.drawString(left_margin, y_position, current_line)
+                if current_words:
+                    c.drawString(left_margin, y_position, " ".join(current_words))
                     y_position -= line_height
 
             # Space between paragraphs
@@ -307,10 +348,8 @@ def create_pdf_advanced(cover_letter_text: str, candidate_name: str = None) -> b
         # Save PDF
         c.save()
 
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-
-        return pdf_bytes
+        with buffer:
+            return buffer.getvalue()
 
     except Exception as e:
         # Fallback to simple version
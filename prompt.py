@@ -1,67 +1,177 @@
 import boto3
-import json
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import orjson
 import os
+import re
+import time
+import uuid
 from dotenv import load_dotenv
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple, Union
+from datetime import date, datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
 
+# Output token cap per cover letter: 350-450 words plus header, employer
+# block and sign-off is roughly 600-750 tokens. The cap leaves headroom so only
+# runaway output is cut, and a cut letter is rejected via stop_reason.
+MAX_OUTPUT_TOKENS = 1024
+
+# Raised when the model stopped at the output token cap mid-letter
+_TRUNCATED_MESSAGE = "Generated cover letter was cut off at the output token limit"
+
+# Opening of a leftover JSON wrapper around streamed text: optional '{',
+# '"cover_letter":' and opening quote. Only ever matched at the start of
+# stripped text, so it cannot backtrack over the letter itself.
+_JSON_PREFIX_RE = re.compile(r'\{?\s*(?:"cover_letter"\s*:\s*)?"?')
+
+# Separates job descriptions in a batch request
+BATCH_DELIMITER = "=== JOB {n} ==="
+
+# Tools the model is forced to call when the whole response is parsed at once,
+# so the cover letter text arrives as structured JSON instead of free text
+EMIT_COVER_LETTER_TOOL = {
+    "name": "emit_cover_letter",
+    "description": "Return the finished cover letter as plain text.",
+    "input_schema": {
+        "type": "object",
+        "properties": {"cover_letter": {"type": "string"}},
+        "required": ["cover_letter"]
+    }
+}
+EMIT_COVER_LETTERS_TOOL = {
+    "name": "emit_cover_letters",
+    "description": "Return the finished cover letters as plain text, one per job description, in job order.",
+    "input_schema": {
+        "type": "object",
+        "properties": {"cover_letters": {"type": "array", "items": {"type": "string"}}},
+        "required": ["cover_letters"]
+    }
+}
 
-# Initialize AWS Bedrock client
-def get_bedrock_client():
+
+def _aws_credentials() -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
-    Initialize and return AWS Bedrock client.
+    Read AWS credentials from the environment.
+
+    When no keys are set, boto3's default credential chain (shared config,
+    SSO, instance/task roles) is used instead.
 
     Returns:
-        boto3 client for Bedrock Runtime
+        (access key id, secret access key, session token), each possibly None
 
     Raises:
-        Exception: If AWS credentials are not configured
+        Exception: If only one of the key pair is set
     """
-    try:
-        aws_access_key = os.getenv('AWS_ACCESS_KEY_ID')
-        aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
-
-        if not aws_access_key or not aws_secret_key:
-            raise Exception(
-                "AWS credentials not found in .env file. Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
-
-        bedrock = boto3.client(
-            service_name="bedrock-runtime",
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            region_name="us-east-1"
-        )
+    access_key = os.getenv('AWS_ACCESS_KEY_ID')
+    secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
 
-        return bedrock
-    except Exception as e:
-        raise Exception(f"Failed to initialize AWS Bedrock client: {str(e)}")
+    if bool(access_key) != bool(secret_key):
+        raise Exception(
+            "Incomplete AWS credentials in .env file. Set both AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY, or neither")
+
+    return access_key, secret_key, os.getenv('AWS_SESSION_TOKEN')
+
+
+# Fail at import on a half-configured key pair
+_aws_credentials()
+
+# HTTP connections the shared client keeps; also caps generate_many's threads
+_MAX_POOL_CONNECTIONS = 32
 
+# Connection settings for the Bedrock client: keep idle sockets alive, fail
+# fast on connect, allow long generations, and back off adaptively when throttled
+_BEDROCK_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=120,
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    max_pool_connections=_MAX_POOL_CONNECTIONS
+)
 
-def create_cover_letter_prompt(resume: Dict[str, Any], job_description: str) -> str:
+
+def _create_aws_client(service_name: str):
     """
-    Create an optimized prompt for cover letter generation.
+    Build a new boto3 client from the credentials currently in the environment.
 
     Args:
-        resume: Resume data dictionary
-        job_description: Job description text
+        service_name: AWS service, e.g. "bedrock-runtime" or "s3"
 
     Returns:
-        Formatted prompt string
+        boto3 client for the service
     """
-    # Format resume data
-    resume_text = format_resume_data(resume)
+    access_key, secret_key, session_token = _aws_credentials()
 
-    # Today's date
-    today_date = datetime.today().strftime("%B %d, %Y")
+    return boto3.client(
+        service_name=service_name,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        aws_session_token=session_token,
+        region_name="us-east-1",
+        config=_BEDROCK_CONFIG
+    )
+
+
+def _create_bedrock_client():
+    """
+    Build a new Bedrock Runtime client from the configured credentials.
+
+    Returns:
+        boto3 client for Bedrock Runtime
+    """
+    return _create_aws_client("bedrock-runtime")
+
+
+@lru_cache(maxsize=1)
+def _get_bedrock_client_cached():
+    """
+    Return the process-wide Bedrock Runtime client.
+
+    boto3 clients are thread-safe, so one client (and its connection pool)
+    is shared by every caller.
+    """
+    return _create_bedrock_client()
+
+
+# Initialize AWS Bedrock client
+def get_bedrock_client():
+    """
+    Return an AWS Bedrock client.
+
+    The same client is reused for the life of the process. Credentials from
+    boto3's default chain refresh on their own; keys set in the environment
+    (including a temporary AWS_SESSION_TOKEN) are fixed for the client's
+    lifetime, so after rotating them call clear_cache() and the next client
+    is built from the new values.
+
+    Returns:
+        boto3 client for Bedrock Runtime
+
+    Raises:
+        Exception: If the client cannot be created
+    """
+    try:
+        return _get_bedrock_client_cached()
+    except Exception as e:
+        raise Exception(f"Failed to initialize AWS Bedrock client: {str(e)}")
 
-    # Extract candidate info
-    candidate_name = resume.get('name', 'Candidate Name')
-    contacts = resume.get('contacts', {})
 
-    prompt = f"""You are an expert cover letter writer specializing in creating compelling, personalized cover letters for Gen Z professionals. Your task is to create a professional yet modern cover letter that authentically showcases the candidate's fit for the position.
+def clear_cache() -> None:
+    """Drop the cached Bedrock client so the next call builds a new one from the environment."""
+    _get_bedrock_client_cached.cache_clear()
+
+
+@lru_cache(maxsize=2)
+def _today_str(ordinal: int) -> str:
+    """Format a date ordinal as e.g. 'October 15, 2025'; cached per day."""
+    return datetime.fromordinal(ordinal).strftime("%B %d, %Y")
+
+
+# Static prompt skeleton, filled in per resume by create_cover_letter_prompt
+_PROMPT_TEMPLATE = """You are an expert cover letter writer specializing in creating compelling, personalized cover letters for Gen Z professionals. Your task is to create a professional yet modern cover letter that authentically showcases the candidate's fit for the position.
 
 **TODAY'S DATE: {today_date}**
 
@@ -69,18 +179,14 @@ def create_cover_letter_prompt(resume: Dict[str, Any], job_description: str) ->
 {resume_text}
 
 **JOB DESCRIPTION:**
-{job_description}
+Provided in the user message.
 
 **STRICT FORMAT REQUIREMENTS:**
 
 The cover letter MUST follow this exact structure:
 
 1. **Header (My Information):**
-   {candidate_name}
-   {contacts.get('email', '[Email]')}
-   {contacts.get('phone', '[Phone]')}
-   {contacts.get('location', '[Location]')}
-   {contacts.get('linkedin', '[LinkedIn]')}
+{header_block}
 
 2. **Date:**
    {today_date}
@@ -96,307 +202,681 @@ The cover letter MUST follow this exact structure:
 5. **Greeting:**
    Dear Hiring Manager, (or use specific name if mentioned in JD)
 
-6. **Opening Paragraph – Hook & Purpose (60-80 words):**
-   - Strong, engaging hook that shows enthusiasm
-   - Mention the specific position you're applying for
-   - Brief statement of why you're an excellent fit
-   - Use conversational yet professional tone
-
-7. **Middle Paragraph(s) – Experience & Skills (2-3 paragraphs, 100-120 words each):**
-   - **Paragraph 1:** Highlight 2-3 most relevant experiences that directly align with job requirements
-   - **Paragraph 2:** Showcase technical skills and projects with specific examples and metrics
-   - **Paragraph 3 (if needed):** Demonstrate cultural fit, soft skills, and enthusiasm for the company/role
-   - Use specific metrics, achievements, and concrete examples
-   - Draw clear connections between resume and job requirements
-   - Avoid generic statements; be specific and authentic
-
-8. **Closing Paragraph – Alignment & Call to Action (50-70 words):**
-   - Express strong interest in the opportunity
-   - State why you're a great fit (brief summary)
-   - Include call to action (request for interview/discussion)
-   - Thank them for their consideration
+6. **Opening Paragraph (60-80 words):** Engaging hook, the exact position, and why you fit.
+
+7. **Middle Paragraphs (2-3, 100-120 words each):**
+   - Most relevant 2-3 experiences mapped to the job requirements
+   - Technical skills and projects, with metrics
+   - Optional: cultural fit and enthusiasm for the company/role
+
+8. **Closing Paragraph (50-70 words):** Restate fit, ask for an interview, thank them.
 
 9. **Sign-off:**
    Sincerely,
    {candidate_name}
 
-**STYLE GUIDELINES:**
-- Professional but conversational Gen Z tone (avoid overly formal or stiff language)
-- Use active voice and strong action verbs
-- Be confident without being arrogant
-- Show genuine enthusiasm and personality
-- No buzzwords or corporate jargon
-- Use "I" statements to show ownership of achievements
-- Keep it authentic and human
+**GUIDELINES:**
+- Professional but conversational Gen Z tone; active voice, "I" statements, no buzzwords or jargon
+- Confident, authentic and specific: concrete numbers and achievements, no generic claims
+- Use company details from the JD when available
 - Extract company name and job title accurately from the job description
+- 350-450 words total, excluding header and employer info
+- Follow the structure above EXACTLY, with each section separated by a blank line"""
 
-**CONTENT GUIDELINES:**
-- Match skills and experiences from resume to job requirements
-- Use specific numbers, metrics, and achievements
-- Show you've researched the company (if info available in JD)
-- Demonstrate how you can add value
-- Be memorable and compelling
 
-**TOTAL LENGTH:** 350-450 words maximum (excluding header and employer info)
+@lru_cache(maxsize=32)
+def _header_block(name: str, email: str, phone: str, location: str, linkedin: str) -> str:
+    """Indented header lines for the prompt; cached per candidate."""
+    return "\n".join(f"   {line}" for line in (name, email, phone, location, linkedin))
 
-**CRITICAL:** Follow the format structure EXACTLY as specified above. Each section should be clearly separated with proper spacing.
 
-Generate a cover letter that would make a hiring manager excited to interview this candidate. Make it memorable, specific, and compelling while maintaining professionalism."""
+def create_cover_letter_prompt(resume: Dict[str, Any]) -> str:
+    """
+    Create an optimized prompt for cover letter generation.
 
-    return prompt
+    The prompt only depends on the resume (and today's date) so it can be
+    cached by Bedrock; the job description is sent in a separate message.
 
+    Args:
+        resume: Resume data dictionary
 
-def format_resume_data(resume: Dict[str, Any]) -> str:
+    Returns:
+        Formatted prompt string
     """
-    Format resume data for the prompt.
+    # Format resume data
+    resume_text = format_resume_data(resume)
+
+    # Today's date
+    today_date = _today_str(date.today().toordinal())
+
+    # Extract candidate info
+    candidate_name = resume.get('name', 'Candidate Name')
+    contacts = resume.get('contacts', {})
+    email = contacts.get('email', '[Email]')
+    phone = contacts.get('phone', '[Phone]')
+    location = contacts.get('location', '[Location]')
+    linkedin = contacts.get('linkedin', '[LinkedIn]')
+
+    return _PROMPT_TEMPLATE.format_map({
+        'today_date': today_date,
+        'resume_text': resume_text,
+        'candidate_name': candidate_name,
+        'header_block': _header_block(str(candidate_name), str(email), str(phone), str(location), str(linkedin)),
+    })
+
+
+def _as_list(value) -> list:
+    """Wrap a single value in a list; lists are returned unchanged."""
+    return value if isinstance(value, list) else [value]
+
+
+def _iter_sections(resume: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the lines of the formatted resume, in prompt order.
 
     Args:
         resume: Resume dictionary
 
-    Returns:
-        Formatted string
+    Yields:
+        Formatted lines
     """
-    sections = []
-
     # Name and Contact
     if 'name' in resume:
-        sections.append(f"**Name:** {resume['name']}")
+        yield f"**Name:** {resume['name']}"
 
     contacts = resume.get('contacts', {})
-    contact_info = []
-    for key, value in contacts.items():
-        contact_info.append(f"{key.title()}: {value}")
-    if contact_info:
-        sections.append(f"**Contact:** {' | '.join(contact_info)}")
+    if contacts:
+        yield f"**Contact:** {' | '.join(f'{key.title()}: {value}' for key, value in contacts.items())}"
 
     # Summary if available
     if 'summary' in resume:
-        sections.append(f"**Summary:** {resume['summary']}")
+        yield f"**Summary:** {resume['summary']}"
 
     # Experience
-    sections.append("\n**EXPERIENCE:**")
+    yield "\n**EXPERIENCE:**"
     for i, exp in enumerate(resume.get('experience', []), 1):
-        if isinstance(exp, dict):
-            title = exp.get('title', 'N/A')
-            company = exp.get('company', 'N/A')
-            duration = exp.get('duration', 'N/A')
-            sections.append(f"{i}. {title} at {company} ({duration})")
-
-            if 'responsibilities' in exp:
-                resp_list = exp['responsibilities'] if isinstance(exp['responsibilities'], list) else [
-                    exp['responsibilities']]
-                for resp in resp_list[:4]:  # Limit to top 4
-                    sections.append(f"   - {resp}")
-        else:
-            sections.append(f"{i}. {exp}")
+        if not isinstance(exp, dict):
+            yield f"{i}. {exp}"
+            continue
+
+        yield f"{i}. {exp.get('title', 'N/A')} at {exp.get('company', 'N/A')} ({exp.get('duration', 'N/A')})"
+        if 'responsibilities' in exp:
+            # Limit to top 4
+            yield from [f"   - {resp}" for resp in _as_list(exp['responsibilities'])[:4]]
 
     # Skills
     skills = resume.get('skills', [])
     if isinstance(skills, list):
-        sections.append(f"\n**SKILLS:** {', '.join(str(s) for s in skills)}")
+        yield f"\n**SKILLS:** {', '.join(str(s) for s in skills)}"
     else:
-        sections.append(f"\n**SKILLS:** {skills}")
+        yield f"\n**SKILLS:** {skills}"
 
     # Projects
-    sections.append("\n**PROJECTS:**")
+    yield "\n**PROJECTS:**"
     for i, proj in enumerate(resume.get('project', []), 1):
-        if isinstance(proj, dict):
-            name = proj.get('name', 'Untitled Project')
-            desc = proj.get('description', '')
-            tech = proj.get('technologies', [])
-            sections.append(f"{i}. {name}")
-            if desc:
-                sections.append(f"   Description: {desc}")
-            if tech:
-                tech_str = ', '.join(tech) if isinstance(tech, list) else tech
-                sections.append(f"   Technologies: {tech_str}")
-        else:
-            sections.append(f"{i}. {proj}")
+        if not isinstance(proj, dict):
+            yield f"{i}. {proj}"
+            continue
+
+        yield f"{i}. {proj.get('name', 'Untitled Project')}"
+        desc = proj.get('description', '')
+        if desc:
+            yield f"   Description: {desc}"
+        tech = proj.get('technologies', [])
+        if tech:
+            yield f"   Technologies: {', '.join(tech) if isinstance(tech, list) else tech}"
 
     # Education
     if 'education' in resume:
-        sections.append("\n**EDUCATION:**")
-        edu_list = resume['education'] if isinstance(resume['education'], list) else [resume['education']]
-        for edu in edu_list:
+        yield "\n**EDUCATION:**"
+        for edu in _as_list(resume['education']):
             if isinstance(edu, dict):
-                degree = edu.get('degree', 'N/A')
-                institution = edu.get('institution', 'N/A')
                 duration = edu.get('duration', '')
-                sections.append(f"- {degree} from {institution}" + (f" ({duration})" if duration else ""))
+                yield (f"- {edu.get('degree', 'N/A')} from {edu.get('institution', 'N/A')}"
+                       + (f" ({duration})" if duration else ""))
             else:
-                sections.append(f"- {edu}")
+                yield f"- {edu}"
 
     # Achievements
     if 'achievements' in resume:
-        sections.append("\n**ACHIEVEMENTS:**")
-        ach_list = resume['achievements'] if isinstance(resume['achievements'], list) else [resume['achievements']]
-        for ach in ach_list:
-            sections.append(f"- {ach}")
+        yield "\n**ACHIEVEMENTS:**"
+        yield from [f"- {ach}" for ach in _as_list(resume['achievements'])]
 
     # Certifications
-    if 'certifications' in resume and resume['certifications']:
-        sections.append("\n**CERTIFICATIONS:**")
-        cert_list = resume['certifications'] if isinstance(resume['certifications'], list) else [
-            resume['certifications']]
-        for cert in cert_list:
-            sections.append(f"- {cert}")
+    if resume.get('certifications'):
+        yield "\n**CERTIFICATIONS:**"
+        yield from [f"- {cert}" for cert in _as_list(resume['certifications'])]
 
-    return "\n".join(sections)
 
+def format_resume_data(resume: Dict[str, Any]) -> str:
+    """
+    Format resume data for the prompt.
 
-def create_example_response(candidate_name: str) -> dict:
+    Args:
+        resume: Resume dictionary
+
+    Returns:
+        Formatted string
     """
-    Create an example response structure for the AI to follow.
+    return "\n".join(_iter_sections(resume))
+
+
+def _build_request(resume: Dict[str, Any], request_content: str, max_tokens: int,
+                   tool: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build the Anthropic Messages request sent to Bedrock.
+
+    Args:
+        resume: Resume data dictionary
+        request_content: Final user message with the job description(s)
+        max_tokens: Output token cap
+        tool: Optional tool the model must call to return its answer
 
     Returns:
-        Example response dictionary
+        Request body as a dictionary, ready to be serialized
     """
-    return {
-        "cover_letter": f"""Keshav Arri
-arri@uwindsor.ca
-647-227-1538
-Windsor, Ontario
-https://www.linkedin.com/in/keshav-kumar-arri/
+    # Create prompt (resume + instructions, identical across job descriptions).
+    # It already casts the model as a cover letter writer, so it serves as the
+    # system prompt and the job description(s) go in the only user message.
+    prompt_content = create_cover_letter_prompt(resume)
+
+    system_block = {"type": "text", "text": prompt_content}
+    if PROMPT_CACHING:
+        # Cache point: the system prompt is reused across job descriptions
+        system_block["cache_control"] = {"type": "ephemeral"}
+
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "system": [system_block],
+        "messages": [
+            {
+                "role": "user",
+                "content": request_content
+            }
+        ],
+    }
 
-October 15, 2025
+    if tool is not None:
+        body["tools"] = [tool]
+        body["tool_choice"] = {"type": "tool", "name": tool["name"]}
 
-Hiring Manager
-[Company Name]
-[City, Province]
+    return body
 
-Subject: Application for [Job Title]
 
-Dear Hiring Manager,
+def create_request_body(resume: Dict[str, Any], job_description: str, structured: bool = False,
+                        max_output_tokens: int = MAX_OUTPUT_TOKENS) -> bytes:
+    """
+    Build the request body for a single cover letter.
 
-[Opening paragraph with enthusiasm and specific position mention - 60-80 words]
+    Args:
+        resume: Resume data dictionary
+        job_description: Job description text
+        structured: Force the answer through EMIT_COVER_LETTER_TOOL; use when
+            the full response is parsed at once rather than streamed as text
+        max_output_tokens: Output token cap
 
-[Body paragraph 1 highlighting relevant experience with specific examples and metrics - 100-120 words]
+    Returns:
+        JSON encoded request body (UTF-8 bytes)
+    """
+    return orjson.dumps(_single_request(resume, job_description, structured, max_output_tokens))
 
-[Body paragraph 2 showcasing technical skills and projects with achievements - 100-120 words]
 
-[Body paragraph 3 demonstrating cultural fit and alignment with company values - 100-120 words]
+def _single_request(resume: Dict[str, Any], job_description: str, structured: bool,
+                    max_output_tokens: int) -> Dict[str, Any]:
+    """Build the unserialized request for create_request_body"""
+    request_content = f"**JOB DESCRIPTION:**\n{job_description}\n\nNow generate the cover letter, following the format structure with all sections in order."
+    if structured:
+        request_content += f" Return it with the {EMIT_COVER_LETTER_TOOL['name']} tool."
+    else:
+        request_content += " Respond with just the cover letter text, no JSON wrapper."
 
-[Closing paragraph expressing interest and call to action - 50-70 words]
+    return _build_request(resume, request_content, max_tokens=max_output_tokens,
+                          tool=EMIT_COVER_LETTER_TOOL if structured else None)
 
-Sincerely,
-{candidate_name}"""
-    }
 
+def create_batch_request_body(resume: Dict[str, Any], job_descriptions: List[str]) -> bytes:
+    """
+    Build a request body asking for one cover letter per job description.
+
+    Args:
+        resume: Resume data dictionary
+        job_descriptions: Job description texts
 
-def generate_cover_letter_with_ai(resume, job_description: str) -> str:
+    Returns:
+        JSON encoded request body (UTF-8 bytes)
+    """
+    jobs = "\n\n".join(
+        f"{BATCH_DELIMITER.format(n=i)}\n{jd}" for i, jd in enumerate(job_descriptions, 1)
+    )
+
+    request_content = f"""**JOB DESCRIPTIONS:**
+{jobs}
+
+Write one complete cover letter for EACH job description above and return them with the {EMIT_COVER_LETTERS_TOOL['name']} tool, in the same order as the jobs. Do not include the delimiter lines in the cover letters. IMPORTANT: Follow the exact format structure with all sections in order for every cover letter."""
+
+    return orjson.dumps(_build_request(resume, request_content, max_tokens=MAX_OUTPUT_TOKENS * len(job_descriptions),
+                                       tool=EMIT_COVER_LETTERS_TOOL))
+
+
+def tool_input(result: Dict[str, Any], tool: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the arguments the model passed to a forced tool call.
+
+    Args:
+        result: Parsed Anthropic Messages response
+        tool: Tool definition that was forced via tool_choice
+
+    Returns:
+        Tool input object
+
+    Raises:
+        Exception: If the response has no call to that tool
+    """
+    for block in result.get('content', []):
+        if block.get('type') == 'tool_use' and block.get('name') == tool['name']:
+            return block['input']
+    raise Exception(f"Model response did not call {tool['name']}")
+
+
+def tool_field(result: Dict[str, Any], tool: Dict[str, Any], field: str) -> Any:
+    """
+    Extract one required argument from a forced tool call.
+
+    Args:
+        result: Parsed Anthropic Messages response
+        tool: Tool definition that was forced via tool_choice
+        field: Name of the argument to return
+
+    Returns:
+        The argument's value
+
+    Raises:
+        Exception: If the call is missing or lacks the argument (e.g. truncated output)
+    """
+    value = tool_input(result, tool).get(field)
+    if value is None:
+        raise Exception(f"Model called {tool['name']} without '{field}'; the response may have been truncated")
+    return value
+
+
+def check_cover_letter(cover_letter: str) -> str:
+    """
+    Strip surrounding whitespace and make sure the cover letter is not truncated.
+
+    Args:
+        cover_letter: Cover letter text
+
+    Returns:
+        Stripped cover letter text
+
+    Raises:
+        Exception: If the cover letter is too short
+    """
+    cover_letter = cover_letter.strip()
+
+    # Validate minimum length
+    if len(cover_letter) < 100:
+        raise Exception("Generated cover letter is too short")
+
+    return cover_letter
+
+
+def clean_cover_letter(content: str) -> str:
+    """
+    Strip any JSON wrapper the model put around a streamed cover letter.
+
+    Streaming returns free text, so it cannot use a forced tool call; whole
+    responses use EMIT_COVER_LETTER(S)_TOOL and skip this.
+
+    Args:
+        content: Raw text returned by the model
+
+    Returns:
+        Cleaned cover letter text
+
+    Raises:
+        Exception: If the raw or cleaned cover letter is too short
+    """
+    # Cleanup only ever shortens the text, so a short response can fail before it runs
+    if len(content) < 100:
+        raise Exception("Generated cover letter is too short")
+
+    # Plain text is the normal case; only attempt a JSON parse when it looks like an object
+    cover_letter = content
+    if content.lstrip().startswith('{'):
+        try:
+            j_ = orjson.loads(content)
+            cover_letter = j_.get('cover_letter', content)
+        except orjson.JSONDecodeError:
+            # If not valid JSON, fall through to the artifact cleanup below
+            pass
+
+    # Strip a leftover (possibly malformed) {"cover_letter": "..."} wrapper:
+    # the opening via an anchored regex, the closing '"' and '}' by hand
+    cover_letter = cover_letter.strip()
+    cover_letter = cover_letter[_JSON_PREFIX_RE.match(cover_letter).end():]
+    if cover_letter.endswith('}'):
+        cover_letter = cover_letter[:-1].rstrip()
+    if cover_letter.endswith('"'):
+        cover_letter = cover_letter[:-1]
+
+    return check_cover_letter(cover_letter)
+
+
+# User-facing prefixes for Bedrock error codes. Errors raised mid-stream
+# (EventStreamError) carry the stream member name, e.g. 'throttlingException',
+# so codes are looked up with their first letter upper-cased.
+_BEDROCK_ERROR_MESSAGES = {
+    'ValidationException': "Validation error",
+    'ThrottlingException': "Rate limit exceeded. Please try again in a moment",
+    'ModelTimeoutException': "Model timeout. Please try again",
+    'ModelStreamErrorException': "Model stream interrupted. Please try again",
+    'ServiceUnavailableException': "Bedrock is temporarily unavailable. Please try again",
+    'ServiceQuotaExceededException': "Service quota exceeded",
+}
+
+
+def bedrock_error(e: Exception) -> Exception:
+    """
+    Map an exception raised while calling Bedrock to a user-facing error.
+
+    Args:
+        e: Original exception
+
+    Returns:
+        Exception with a descriptive message
+    """
+    error_msg = str(e)
+
+    # Check for specific AWS errors by their error code
+    if isinstance(e, ClientError):
+        code = e.response.get('Error', {}).get('Code') or ''
+        prefix = _BEDROCK_ERROR_MESSAGES.get(code[:1].upper() + code[1:])
+        if prefix:
+            return Exception(f"{prefix}: {error_msg}")
+
+    return Exception(f"AWS Bedrock API error: {error_msg}")
+
+
+# Model configuration
+# Cross-region inference profile; Bedrock requires one for on-demand streaming
+MODEL_ID = "us.anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+# Models Bedrock supports prompt caching for. Other models may reject a
+# cache_control block, so it is only sent when MODEL_ID is listed here.
+PROMPT_CACHING_MODELS = frozenset({
+    "anthropic.claude-3-5-haiku-20241022-v1:0",
+    "anthropic.claude-3-7-sonnet-20250219-v1:0",
+})
+PROMPT_CACHING = MODEL_ID.split('.', 1)[-1] in PROMPT_CACHING_MODELS or MODEL_ID in PROMPT_CACHING_MODELS
+
+# Cover letters per batched call; the model returns at most 4096 output tokens
+MAX_BATCH_SIZE = 4
+
+# Bedrock batch inference (asynchronous, billed at a discount). Jobs read their
+# input from and write their output to S3, and need an IAM role Bedrock can assume.
+BATCH_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+BATCH_BUCKET = os.getenv('BEDROCK_BATCH_BUCKET')
+BATCH_ROLE_ARN = os.getenv('BEDROCK_BATCH_ROLE_ARN')
+BATCH_PREFIX = "cover-letter-batches"
+# Bedrock rejects batch jobs with fewer records than this
+BATCH_MIN_RECORDS = 100
+
+
+def generate_cover_letter_with_ai(resume, job_description: str, bedrock=None,
+                                  on_chunk: Optional[Callable[[str], None]] = None,
+                                  max_output_tokens: int = MAX_OUTPUT_TOKENS) -> str:
     """
     Generate cover letter using AWS Bedrock Claude Sonnet 3.5.
 
+    The response is streamed, so on_chunk can show text as soon as the
+    first tokens arrive.
+
     Args:
         resume: Resume data dictionary
         job_description: Job description text
+        bedrock: Optional Bedrock runtime client; the shared get_bedrock_client() client is used if omitted
+        on_chunk: Optional callback invoked with each raw text chunk
+        max_output_tokens: Output token cap
 
     Returns:
         Generated cover letter text
 
+    Raises:
+        Exception: If API call fails
+    """
+    chunks = []
+    for text in stream_cover_letter_with_ai(resume, job_description, bedrock=bedrock,
+                                            max_output_tokens=max_output_tokens):
+        chunks.append(text)
+        if on_chunk is not None:
+            on_chunk(text)
+
+    try:
+        return clean_cover_letter("".join(chunks))
+    except Exception as e:
+        raise bedrock_error(e)
+
+
+def stream_cover_letter_with_ai(resume, job_description: str, bedrock=None,
+                                max_output_tokens: int = MAX_OUTPUT_TOKENS) -> Iterator[str]:
+    """
+    Stream the cover letter from AWS Bedrock as it is generated.
+
+    Args:
+        resume: Resume data dictionary
+        job_description: Job description text
+        bedrock: Optional Bedrock runtime client; the shared get_bedrock_client() client is used if omitted
+        max_output_tokens: Output token cap
+
+    Yields:
+        Raw text chunks; pass the joined text to clean_cover_letter
+
     Raises:
         Exception: If API call fails
     """
     try:
         # Get Bedrock client
-        bedrock = get_bedrock_client()
+        if bedrock is None:
+            bedrock = get_bedrock_client()
+
+        response = bedrock.invoke_model_with_response_stream(
+            modelId=MODEL_ID,
+            body=create_request_body(resume, job_description, max_output_tokens=max_output_tokens),
+            accept="application/json",
+            contentType="application/json"
+        )
+
+        for event in response.get('body'):
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+
+            data = orjson.loads(chunk['bytes'])
+            if data.get('type') == 'content_block_delta':
+                text = data['delta'].get('text')
+                if text:
+                    yield text
+            elif data.get('type') == 'message_delta' and data['delta'].get('stop_reason') == 'max_tokens':
+                raise Exception(_TRUNCATED_MESSAGE)
+
+    except Exception as e:
+        raise bedrock_error(e)
+
+
+def generate_cover_letters_batch_with_ai(resume, job_descriptions: List[str], bedrock=None) -> List[str]:
+    """
+    Generate several cover letters for one resume in a single Bedrock call.
 
-        # Create prompt
-        prompt_content = create_cover_letter_prompt(resume, job_description)
+    The resume and instructions are sent once for all job descriptions.
 
-        # Get candidate name for example
-        candidate_name = resume.get('name', 'Candidate Name')
+    Args:
+        resume: Resume data dictionary
+        job_descriptions: Up to MAX_BATCH_SIZE job description texts
+        bedrock: Optional Bedrock runtime client; the shared get_bedrock_client() client is used if omitted
 
-        # Assistant prompt to guide response format
-        user_content = "You are an expert in creating professional and creative cover letters using Job description and Resume. Follow the exact format structure provided."
+    Returns:
+        Generated cover letters, in the same order as job_descriptions
 
-        # Example response structure
-        example_response = create_example_response(candidate_name)
+    Raises:
+        Exception: If API call fails
+    """
+    if len(job_descriptions) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} job descriptions can be sent in one call")
 
-        # Model configuration
-        model_id = "anthropic.claude-3-5-sonnet-20240620-v1:0"
-        accept = "application/json"
-        contentType = "application/json"
+    try:
+        # Get Bedrock client
+        if bedrock is None:
+            bedrock = get_bedrock_client()
 
-        # Invoke model with your specified format
         response = bedrock.invoke_model(
-            modelId=model_id,
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4000,
-                "temperature": 0.7,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_content
-                    },
-                    {
-                        "role": "assistant",
-                        "content": prompt_content
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Example response format (follow this structure EXACTLY):\n{json.dumps(example_response, indent=4)}\n\nNow generate the actual cover letter based on the resume and job description provided. IMPORTANT: Follow the exact format structure with all sections in order."
-                    }
-                ],
-            }),
-            accept=accept,
-            contentType=contentType
+            modelId=MODEL_ID,
+            body=create_batch_request_body(resume, job_descriptions),
+            accept="application/json",
+            contentType="application/json"
         )
 
         # Parse response
-        result = json.loads(response.get('body').read())
-        content = result['content'][0]['text']
+        result = orjson.loads(response.get('body').read())
+        if result.get('stop_reason') == 'max_tokens':
+            raise Exception(_TRUNCATED_MESSAGE)
+        cover_letters = tool_field(result, EMIT_COVER_LETTERS_TOOL, 'cover_letters')
+
+        if len(cover_letters) != len(job_descriptions):
+            raise Exception(f"Expected {len(job_descriptions)} cover letters, got {len(cover_letters)}")
 
-        # Try to parse as JSON first, if that fails, use as plain text
-        # Try to parse as JSON first, if that fails, use as plain text
+        return [check_cover_letter(cover_letter) for cover_letter in cover_letters]
+
+    except Exception as e:
+        raise bedrock_error(e)
+
+
+def generate_many(pairs: List[Tuple[Dict[str, Any], str]], max_workers: int = 8) -> List[Union[str, Exception]]:
+    """
+    Generate cover letters for a small burst of (resume, job description)
+    pairs concurrently, sharing the cached Bedrock client.
+
+    A failure (e.g. throttling) for one pair does not stop the others; its
+    exception is returned in place of the cover letter.
+
+    Args:
+        pairs: (resume, job description) tuples
+        max_workers: Concurrent requests, capped at the client's connection pool size
+
+    Returns:
+        Cover letter text or the raised exception for each pair, in order
+    """
+    bedrock = get_bedrock_client()
+
+    def generate(pair):
         try:
-            j_ = json.loads(content)
-            cover_letter = j_.get('cover_letter', content)
-        except json.JSONDecodeError:
-            # If not JSON, use the content directly
-            cover_letter = content
-
-        # Clean up any remaining JSON artifacts
-        if cover_letter.strip().startswith('{'):
-            # Try to extract cover letter from malformed JSON
-            try:
-                # Look for "cover_letter": pattern
-                if '"cover_letter":' in cover_letter:
-                    start = cover_letter.find('"cover_letter":') + len('"cover_letter":')
-                    # Find the actual content after the key
-                    temp = cover_letter[start:].strip()
-                    if temp.startswith('"'):
-                        temp = temp[1:]  # Remove opening quote
-                        # Find closing quote (accounting for escaped quotes)
-                        end = temp.rfind('"')
-                        if end > 0:
-                            cover_letter = temp[:end]
-            except:
-                pass
-
-        # Remove any leading/trailing JSON characters
-        cover_letter = cover_letter.strip().strip('{').strip('}').strip('"').strip()
-
-        # Clean up the cover letter
-        cover_letter = cover_letter.strip()
-
-        # Validate minimum length
-        if len(cover_letter) < 100:
-            raise Exception("Generated cover letter is too short")
-
-        return cover_letter
+            return generate_cover_letter_with_ai(pair[0], pair[1], bedrock=bedrock)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, _MAX_POOL_CONNECTIONS))) as pool:
+        return list(pool.map(generate, pairs))
+
+
+def generate_cover_letters_batch_job(pairs: List[Tuple[Dict[str, Any], str]],
+                                     poll_interval: float = 30.0) -> List[Union[str, Exception]]:
+    """
+    Generate cover letters for many (resume, job description) pairs with a
+    Bedrock batch inference job.
+
+    Batch jobs take minutes to hours to complete, so this is meant for
+    offline bulk runs. Below BATCH_MIN_RECORDS pairs Bedrock will not accept
+    a job, and each pair is generated directly instead.
+
+    As with generate_many, a pair whose record is missing or unusable does
+    not discard the rest of a finished job; its exception is returned in
+    place of the cover letter.
+
+    Args:
+        pairs: (resume, job description) tuples
+        poll_interval: Seconds between job status checks
+
+    Returns:
+        Cover letter text or the exception for each pair, in order
+
+    Raises:
+        Exception: If the job cannot be submitted, fails, or its output cannot be read
+    """
+    if len(pairs) < BATCH_MIN_RECORDS:
+        return generate_many(pairs)
+
+    if not BATCH_BUCKET or not BATCH_ROLE_ARN:
+        raise Exception("Batch inference needs BEDROCK_BATCH_BUCKET and BEDROCK_BATCH_ROLE_ARN in the .env file")
+
+    try:
+        s3 = _create_aws_client("s3")
+        bedrock = _create_aws_client("bedrock")
+
+        job_name = f"cover-letters-{uuid.uuid4().hex[:12]}"
+        input_key = f"{BATCH_PREFIX}/{job_name}/input.jsonl"
+        output_prefix = f"{BATCH_PREFIX}/{job_name}/output/"
+
+        # One record per pair, with the same body a single invoke_model call
+        # would send; each record is serialized straight to bytes once
+        records = b"\n".join(
+            orjson.dumps({
+                "recordId": f"{i:011d}",
+                "modelInput": _single_request(resume, job_description, True, MAX_OUTPUT_TOKENS)
+            })
+            for i, (resume, job_description) in enumerate(pairs)
+        )
+        s3.put_object(Bucket=BATCH_BUCKET, Key=input_key, Body=records)
+
+        job_arn = bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=BATCH_ROLE_ARN,
+            modelId=BATCH_MODEL_ID,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{BATCH_BUCKET}/{input_key}"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{BATCH_BUCKET}/{output_prefix}"}}
+        )['jobArn']
+
+        # Wait for the job to finish
+        while True:
+            job = bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+            status = job['status']
+            if status in ('Completed', 'PartiallyCompleted'):
+                break
+            if status in ('Failed', 'Stopped', 'Expired'):
+                raise Exception(f"Batch job {job_name} {status.lower()}: {job.get('message', '')}")
+            time.sleep(poll_interval)
+
+        # Output lands in <output prefix>/<job id>/<input file name>.out
+        job_id = job_arn.rsplit('/', 1)[-1]
+        output_key = f"{output_prefix}{job_id}/input.jsonl.out"
+        output = s3.get_object(Bucket=BATCH_BUCKET, Key=output_key)['Body'].read()
 
     except Exception as e:
-        # Check for specific AWS errors
-        error_msg = str(e)
-        if "ValidationException" in error_msg:
-            raise Exception(f"Validation error: {error_msg}")
-        elif "ThrottlingException" in error_msg:
-            raise Exception(f"Rate limit exceeded. Please try again in a moment: {error_msg}")
-        elif "ModelTimeoutException" in error_msg:
-            raise Exception(f"Model timeout. Please try again: {error_msg}")
-        elif "ServiceQuotaExceededException" in error_msg:
-            raise Exception(f"Service quota exceeded: {error_msg}")
-        else:
-            raise Exception(f"AWS Bedrock API error: {error_msg}")
\ No newline at end of file
+        raise bedrock_error(e)
+
+    results: Dict[str, Union[str, Exception]] = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+
+        record_id = record.get('recordId')
+        model_output = record.get('modelOutput')
+        try:
+            if not model_output:
+                error = record.get('error') or {}
+                raise Exception(f"Batch job {job_name} failed this record: {error.get('errorMessage', 'no output')}")
+            if model_output.get('stop_reason') == 'max_tokens':
+                raise Exception(_TRUNCATED_MESSAGE)
+            results[record_id] = check_cover_letter(tool_field(model_output, EMIT_COVER_LETTER_TOOL, 'cover_letter'))
+        except Exception as e:
+            results[record_id] = e
+
+    return [
+        results.get(f"{i:011d}", Exception(f"Batch job {job_name} returned no record for this pair"))
+        for i in range(len(pairs))
+    ]
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from prompt import clean_cover_letter
+
+LETTER = "Dear Hiring Manager,\n\n" + "I am excited to apply for this role. " * 10 + "\n\nSincerely,\nJane Doe"
+
+
+def test_clean_cover_letter_keeps_plain_text():
+    assert clean_cover_letter(LETTER) == LETTER
+
+
+@pytest.mark.parametrize("wrapped", [
+    '{"cover_letter": "' + LETTER + '"}',
+    '{ "cover_letter": "' + LETTER + '"\n}',
+    '"' + LETTER + '"',
+    '{' + LETTER + '}',
+])
+def test_clean_cover_letter_strips_json_wrapper(wrapped):
+    assert clean_cover_letter(wrapped) == LETTER
+
+
+def test_clean_cover_letter_parses_valid_json():
+    assert clean_cover_letter('{"cover_letter": "' + LETTER.replace('\n', '\\n') + '"}') == LETTER
+
+
+def test_clean_cover_letter_rejects_short_text():
+    with pytest.raises(Exception, match="too short"):
+        clean_cover_letter('{"cover_letter": "' + ' ' * 200 + '"}')
+
+
+def test_clean_cover_letter_is_linear_in_whitespace_runs():
+    # Degenerate output (long runs of blank lines) used to backtrack cubically
+    timings = []
+    for size in (3_000, 30_000):
+        content = LETTER + '\n' * size + ' ' * size + LETTER
+
+        start = time.perf_counter()
+        assert clean_cover_letter(content) == content
+        timings.append(time.perf_counter() - start)
+
+    assert timings[1] < 1.0